@@ -5,8 +5,18 @@ import shutil
 import zipfile
 import stat
 import traceback
+import json
+import difflib
+import threading
+import queue
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import diskcache
+from hashlib import sha256
 from werkzeug.utils import secure_filename
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -29,10 +39,50 @@ def remove_readonly(func, path, excinfo):
 # Load environment variables from .env file
 load_dotenv()
 
+# Static README instructions, sent as the system instruction so every request shares
+# the same prompt prefix and only the project analysis varies
+README_INSTRUCTIONS = """
+As an expert senior software developer and technical writer, create an exceptionally detailed and professional README.md file based on the project analysis provided by the user. The tone should be clear, comprehensive, and helpful to a new developer.
+
+**Structure the README with the following sections in this exact order:**
+
+1.  **Project Title:** A creative and descriptive title.
+2.  **Project Overview:** A detailed paragraph explaining the project's purpose, what problem it solves, and who the target user is.
+3.  **Key Features:** A bulleted list of the most important features.
+4.  **Tech Stack:** A table listing the languages, frameworks, major libraries and external APIs (if any) used.
+5.  **Workflow Diagram:** A detailed, text-based (ASCII) flow diagram illustrating the complete data and user flow of the application. The diagram should clearly show the simple path from the user's action on the React frontend, to the backend, to the external API if used any (also mention the name of API used if any), and back to the user.
+6.  **Project Structure:** A brief explanation of the key files and folder structure. Describe the purpose of important files.
+7.  **Setup and Installation:** A clear, step-by-step guide on how to get the project running locally. Include all necessary commands (e.g., `git clone`, `npm install`, `pip install`).
+8.  **Usage:** Explain how to run the application and use its main features after installation.
+9.  **Code Explanation:** (If applicable) Briefly explain the logic of one or two key functions or components from the provided code snippets.
+10. **API Endpoints:** (If it's a backend project) List and describe the API endpoints, including the HTTP method and what they do. Don't assume anything on your own. Don't make any assumptions.
+
+Generate only the Markdown content for the README.md file. Do not include any introductory text like "Here is the README...".
+"""
+
+# Fixed parts of the per-request prompts, joined around the dynamic content
+README_PROMPT_PREFIX = "Here is the project analysis to use:\n---\n"
+README_PROMPT_SUFFIX = "\n---\n"
+FORMAT_PROMPT_PREFIX = """Please format the following text into a clean, well-structured document using Markdown.
+Identify the main title, headings, subheadings, bullet points, and any other relevant structures.
+Ensure the output is only the formatted Markdown content.
+
+Raw Text:
+---
+"""
+FORMAT_PROMPT_SUFFIX = "\n---\n"
+# Separates the formatted texts in a batched response
+BATCH_DELIMITER = "---END---"
+BATCH_PROMPT_PREFIX = f"""Please format each of the following texts into a clean, well-structured document using Markdown.
+For each text, identify the main title, headings, subheadings, bullet points, and any other relevant structures.
+Output only the formatted Markdown content of each text, in the same order, and end each one with a line containing only {BATCH_DELIMITER}
+"""
+
 # Configure the Gemini API
 try:
     genai.configure(api_key=os.environ["GEMINI_API_KEY"])
     model = genai.GenerativeModel('gemini-1.5-flash')
+    readme_model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=README_INSTRUCTIONS)
 except AttributeError as e:
     print(f"Error: The GEMINI_API_KEY is not set. Please check your .env file. Details: {e}")
     exit()
@@ -42,35 +92,396 @@ app = Flask(__name__)
 # NEW, PRODUCTION-READY LINE
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Ensure temp directories exist in every worker (run with `gunicorn app:app`, see gunicorn.conf.py,
+# or `python app.py` for local development)
+os.makedirs("temp_repos", exist_ok=True)
+os.makedirs("temp_uploads", exist_ok=True)
+
+# Gemini responses keyed on a hash of the exact input, so repeated submissions skip the LLM call
+CACHE_TTL_SECONDS = 24 * 60 * 60
+readme_cache = diskcache.Cache('cache/readme')
+format_cache = diskcache.Cache('cache/format')
+# Project analyses of GitHub repos keyed on (repo_url, HEAD commit), so an unchanged repo isn't re-cloned
+summary_cache = diskcache.Cache('cache/summary')
+
+# Semantic cache for /api/format-text: near-duplicate texts reuse an earlier formatting.
+# Each entry holds the unit-length embedding and the raw text of a format_cache entry under
+# the same key and expires with it. Being on disk, it's shared by all workers and survives
+# restarts; size_limit evicts the oldest entries. Each worker mirrors it in a stacked matrix
+# (see load_format_index), so a lookup is a single matrix product.
+EMBEDDING_MODEL = 'models/text-embedding-004'
+# Longer texts would be cut at text-embedding-004's 2048-token input limit, making texts that
+# only differ past the cut look identical, so they skip the semantic cache
+EMBEDDING_MAX_CHARS = 6000
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# A semantic hit must also be near-identical character by character, so a real edit such as an
+# added paragraph is never answered with the formatting of the old text
+SEMANTIC_CACHE_MIN_TEXT_RATIO = 0.99
+format_index = diskcache.Cache('cache/format-index', size_limit=16 * 1024 * 1024,
+                               eviction_policy='least-recently-stored')
+# Rewritten with a fresh token on every insert, so workers can tell their mirror is out of date
+FORMAT_INDEX_VERSION_KEY = '__version__'
+EMBEDDING_DIMENSIONS = 768
+# This worker's mirror of format_index: row i of the matrix belongs to keys[i] and texts[i]
+format_index_mirror = {"version": None, "keys": [], "texts": [],
+                       "matrix": np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)}
+format_index_mirror_lock = threading.Lock()
+
 # --- HELPER FUNCTIONS ---
 
+# Files to prioritize for snippets
+KEY_FILES = frozenset({'package.json', 'requirements.txt', 'index.html', 'main.py', 'app.py', 'server.js'})
+# Ignore node_modules, .git, build output, macOS zip metadata and other common heavy folders
+IGNORED_DIRS = frozenset({'node_modules', '.git', '__pycache__', 'venv', 'dist', 'build', '.next', 'target', '__MACOSX'})
+# Bound on the project analysis pasted into the README prompt; each analyzer also keeps
+# only the first snippet per key file name, so nested package.json files can't crowd out the rest
+MAX_PROMPT_CHARS = 60_000
+
+# Shared pool for independent file reads; threads release the GIL while blocked in read()
+snippet_executor = ThreadPoolExecutor(max_workers=8)
+
+def read_snippet(candidate):
+    """Returns the snippet block for one key file, given its (path, filename)."""
+    path, f = candidate
+    try:
+        # Binary read of just the first 1000 bytes, decoded leniently so a
+        # stray byte or a split character doesn't lose the whole snippet
+        with open(path, 'rb', buffering=0) as file_content:
+            content = file_content.read(1000).decode('utf-8', 'replace')
+            return f"\n--- Content of {f} ---\n{content}\n---------------------\n"
+    except Exception:
+        return f"\n--- Could not read content of {f} ---\n"
+
 def analyze_project_structure(path):
     """Analyzes the code structure and returns a summary."""
-    summary = "Project file structure:\n"
-    code_snippets = "\nKey code snippets:\n"
-    
-    # Files to prioritize for snippets
-    key_files = ['package.json', 'requirements.txt', 'index.html', 'main.py', 'app.py', 'server.js']
-
-    for root, dirs, files in os.walk(path):
-        # Ignore node_modules, .git, and other common folders
-        dirs[:] = [d for d in dirs if d not in ['node_modules', '.git', '__pycache__', 'venv']]
-        
-        level = root.replace(path, '').count(os.sep)
-        indent = ' ' * 4 * (level)
-        summary += f"{indent}{os.path.basename(root)}/\n"
+    summary_parts = ["Project file structure:\n"]
+    code_parts = ["\nKey code snippets:\n"]
+    key_files = KEY_FILES
+    ignored_dirs = IGNORED_DIRS
+    # Key files are only collected during the walk and read in parallel afterwards
+    snippet_candidates = []
+    snippet_names = set()
+
+    # Iterative walk with explicit depth, so no per-directory path arithmetic is needed
+    stack = [(path, 0)]
+    while stack:
+        root, level = stack.pop()
+        summary_parts.append(f"{' ' * 4 * level}{os.path.basename(root)}/\n")
+        sub_indent = ' ' * 4 * (level + 1)
+        subdirs = []
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignored_dirs:
+                        subdirs.append(entry.path)
+                    continue
+                f = entry.name
+                summary_parts.append(f"{sub_indent}{f}\n")
+                if f in key_files and f not in snippet_names:
+                    snippet_names.add(f)
+                    snippet_candidates.append((entry.path, f))
+        # Reversed so the stack pops subdirectories in listing order
+        for subdir in reversed(subdirs):
+            stack.append((subdir, level + 1))
+
+    code_parts.extend(snippet_executor.map(read_snippet, snippet_candidates))
+    return ''.join(summary_parts) + ''.join(code_parts)
+
+def analyze_git_tree(repo, name):
+    """Same summary as analyze_project_structure, read from the HEAD tree of a clone.
+
+    Works on a blobless, unchecked-out clone: only the key files' blobs are
+    fetched from the remote, everything else is listed from tree objects.
+    """
+    summary_parts = ["Project file structure:\n"]
+    code_parts = ["\nKey code snippets:\n"]
+    snippet_names = set()
+
+    stack = [(repo.head.commit.tree, name, 0)]
+    while stack:
+        tree, dirname, level = stack.pop()
+        summary_parts.append(f"{' ' * 4 * level}{dirname}/\n")
         sub_indent = ' ' * 4 * (level + 1)
-        for f in files:
-            summary += f"{sub_indent}{f}\n"
-            if f in key_files:
+        for blob in tree.blobs:
+            summary_parts.append(f"{sub_indent}{blob.name}\n")
+            if blob.name in KEY_FILES and blob.name not in snippet_names:
+                snippet_names.add(blob.name)
                 try:
-                    with open(os.path.join(root, f), 'r', encoding='utf-8') as file_content:
-                        content = file_content.read(1000) # Read first 1000 characters
-                        code_snippets += f"\n--- Content of {f} ---\n{content}\n---------------------\n"
+                    content = blob.data_stream.read(1000).decode('utf-8', 'replace')
+                    code_parts.append(f"\n--- Content of {blob.name} ---\n{content}\n---------------------\n")
                 except Exception:
-                    code_snippets += f"\n--- Could not read content of {f} ---\n"
-                    
-    return summary + code_snippets
+                    code_parts.append(f"\n--- Could not read content of {blob.name} ---\n")
+        subtrees = [t for t in tree.trees if t.name not in IGNORED_DIRS]
+        # Reversed so the stack pops subdirectories in tree order
+        for subtree in reversed(subtrees):
+            stack.append((subtree, subtree.name, level + 1))
+
+    return ''.join(summary_parts) + ''.join(code_parts)
+
+def analyze_zip_structure(zip_ref, name):
+    """
+    Same summary as analyze_project_structure, read straight from an uploaded zip.
+
+    Nothing is extracted: the tree comes from the archive's member names and
+    only the first 1000 bytes of each key file are decompressed.
+    """
+    summary_parts = ["Project file structure:\n"]
+    code_parts = ["\nKey code snippets:\n"]
+    snippet_names = set()
+
+    # Nested {"dirs": {...}, "files": [...]} nodes, in archive order
+    tree = {"dirs": {}, "files": []}
+    for info in zip_ref.infolist():
+        parts = [part for part in info.filename.split('/') if part and part != '.']
+        dir_parts = parts if info.is_dir() else parts[:-1]
+        # Zip Slip style names ("../x") don't belong to the project, so they're left out of the tree
+        if not parts or '..' in parts or IGNORED_DIRS.intersection(dir_parts):
+            continue
+        node = tree
+        for part in dir_parts:
+            node = node["dirs"].setdefault(part, {"dirs": {}, "files": []})
+        if not info.is_dir():
+            node["files"].append((parts[-1], info))
+
+    stack = [(tree, name, 0)]
+    while stack:
+        node, dirname, level = stack.pop()
+        summary_parts.append(f"{' ' * 4 * level}{dirname}/\n")
+        sub_indent = ' ' * 4 * (level + 1)
+        for f, info in node["files"]:
+            summary_parts.append(f"{sub_indent}{f}\n")
+            if f in KEY_FILES and f not in snippet_names:
+                snippet_names.add(f)
+                try:
+                    with zip_ref.open(info) as file_content:
+                        content = file_content.read(1000).decode('utf-8', 'replace')
+                        code_parts.append(f"\n--- Content of {f} ---\n{content}\n---------------------\n")
+                except Exception:
+                    code_parts.append(f"\n--- Could not read content of {f} ---\n")
+        # Reversed so the stack pops subdirectories in archive order
+        for subdir, child in reversed(node["dirs"].items()):
+            stack.append((child, subdir, level + 1))
+
+    return ''.join(summary_parts) + ''.join(code_parts)
+
+def cap_project_summary(project_summary):
+    """
+    Keeps a project analysis within MAX_PROMPT_CHARS.
+
+    The key code snippets are kept whole; the file tree is cut off and the
+    number of omitted entries noted in its place.
+    """
+    if len(project_summary) <= MAX_PROMPT_CHARS:
+        return project_summary
+    tree, separator, snippets = project_summary.partition("\nKey code snippets:\n")
+    budget = MAX_PROMPT_CHARS - len(separator) - len(snippets) - 50
+    lines = tree.splitlines(keepends=True)
+    kept = 0
+    for line in lines:
+        budget -= len(line)
+        if budget < 0:
+            break
+        kept += 1
+    omitted = f"... {len(lines) - kept} more files and folders omitted ...\n"
+    return ''.join(lines[:kept]) + omitted + separator + snippets
+
+# GIT_TERMINAL_PROMPT=0 fails fast on private repos instead of hanging
+GIT_ENV = {"GIT_TERMINAL_PROMPT": "0"}
+
+def remote_head_sha(repo_url):
+    """Returns the commit the remote's HEAD points at, or None for an empty repository."""
+    output = git.cmd.Git().ls_remote(repo_url, 'HEAD', env=GIT_ENV)
+    return output.split()[0] if output else None
+
+SHALLOW_CLONE_OPTIONS = ['--depth=1', '--single-branch', '--no-tags', '--no-checkout']
+
+def clone_repo(repo_url, repo_path):
+    """Clones only what the analysis needs: no history, no tags, no checkout, no blobs.
+
+    Falls back to a clone without the blob filter only when git reports that
+    partial clone isn't supported; any other failure is raised as is.
+    """
+    try:
+        return git.Repo.clone_from(repo_url, repo_path, env=GIT_ENV,
+                                   multi_options=['--filter=blob:none'] + SHALLOW_CLONE_OPTIONS)
+    except git.GitCommandError as e:
+        stderr = str(e.stderr).lower()
+        if 'filter' not in stderr and 'partial clone' not in stderr:
+            raise
+        if os.path.exists(repo_path):
+            shutil.rmtree(repo_path, onerror=remove_readonly)
+        return git.Repo.clone_from(repo_url, repo_path, env=GIT_ENV, multi_options=SHALLOW_CLONE_OPTIONS)
+
+def embed_texts(texts):
+    """
+    Returns the normalized embeddings of texts from a single API call.
+
+    An entry is None where the semantic cache can't be used for that text: it's
+    too long to embed whole, or the embedding call failed.
+    """
+    vectors = [None] * len(texts)
+    embeddable = [i for i, text in enumerate(texts) if len(text) <= EMBEDDING_MAX_CHARS]
+    if not embeddable:
+        return vectors
+    try:
+        result = genai.embed_content(model=EMBEDDING_MODEL, content=[texts[i] for i in embeddable])
+    except Exception:
+        # The semantic cache is only a shortcut, so embedding errors fall through to generation
+        print("--- COULD NOT EMBED THE TEXTS, SKIPPING THE SEMANTIC CACHE ---")
+        traceback.print_exc()
+        return vectors
+    for i, embedding in zip(embeddable, result['embedding']):
+        vector = np.asarray(embedding, dtype=np.float32)
+        vectors[i] = vector / np.linalg.norm(vector)
+    return vectors
+
+def load_format_index():
+    """
+    Brings this worker's mirror of format_index up to date and returns it.
+
+    Only entries the mirror doesn't have yet are read from disk; rows whose
+    entries were evicted or expired are dropped.
+    """
+    with format_index_mirror_lock:
+        version = format_index.get(FORMAT_INDEX_VERSION_KEY)
+        mirror = format_index_mirror
+        if version is not None and version == mirror["version"]:
+            return mirror
+
+        known = {key: row for row, key in enumerate(mirror["keys"])}
+        keys, texts, rows = [], [], []
+        for key in format_index.iterkeys():
+            if key == FORMAT_INDEX_VERSION_KEY:
+                continue
+            if key in known:
+                row = known[key]
+                keys.append(key)
+                texts.append(mirror["texts"][row])
+                rows.append(mirror["matrix"][row])
+                continue
+            entry = format_index.get(key)
+            if entry is None:
+                continue
+            stored_vector, stored_text = entry
+            keys.append(key)
+            texts.append(stored_text)
+            rows.append(np.frombuffer(stored_vector, dtype=np.float32))
+
+        matrix = np.stack(rows) if rows else np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        mirror.update(version=version, keys=keys, texts=texts, matrix=matrix)
+        return mirror
+
+def find_similar_formats(raw_texts, vectors):
+    """Returns, per text, the cached formatting of the most similar earlier text if close enough."""
+    mirror = load_format_index()
+    if not mirror["keys"]:
+        return [None] * len(raw_texts)
+    # One product scores every text against every indexed entry
+    scores = mirror["matrix"] @ np.stack(vectors).T
+    best_rows = np.argmax(scores, axis=0)
+
+    results = []
+    for column, (raw_text, best) in enumerate(zip(raw_texts, best_rows)):
+        if scores[best, column] < SEMANTIC_CACHE_THRESHOLD:
+            results.append(None)
+            continue
+        matcher = difflib.SequenceMatcher(None, mirror["texts"][best], raw_text)
+        # Cheap upper bounds first, the full comparison only if they pass
+        if any(ratio() < SEMANTIC_CACHE_MIN_TEXT_RATIO
+               for ratio in (matcher.real_quick_ratio, matcher.quick_ratio, matcher.ratio)):
+            results.append(None)
+            continue
+        results.append(format_cache.get(mirror["keys"][best]))
+    return results
+
+def remember_format(raw_text, vector, key):
+    """Indexes the embedding of a freshly formatted text under its format_cache key."""
+    format_index.set(key, (vector.tobytes(), raw_text), expire=CACHE_TTL_SECONDS)
+    format_index.set(FORMAT_INDEX_VERSION_KEY, uuid.uuid4().hex)
+
+def lookup_formats(raw_texts):
+    """
+    Looks raw_texts up in the exact and then the semantic format cache.
+
+    Returns one (key, vector, cached) per text; key and vector are what
+    store_format needs when cached is None and the text has to be generated.
+    Exact hits are served first, so only the misses are embedded, together in
+    one call, and scored in one pass over the index.
+    """
+    keys = [sha256(text.encode()).hexdigest() for text in raw_texts]
+    cached = [format_cache.get(key) for key in keys]
+    vectors = [None] * len(raw_texts)
+
+    misses = [i for i, result in enumerate(cached) if result is None]
+    if misses:
+        for i, vector in zip(misses, embed_texts([raw_texts[i] for i in misses])):
+            vectors[i] = vector
+        embedded = [i for i in misses if vectors[i] is not None]
+        if embedded:
+            similar = find_similar_formats([raw_texts[i] for i in embedded], [vectors[i] for i in embedded])
+            for i, result in zip(embedded, similar):
+                cached[i] = result
+    return list(zip(keys, vectors, cached))
+
+def store_format(raw_text, key, vector, formatted_text):
+    """Caches a freshly formatted text for both the exact and the semantic lookup."""
+    format_cache.set(key, formatted_text, expire=CACHE_TTL_SECONDS)
+    if vector is not None:
+        remember_format(raw_text, vector, key)
+
+def sse_event(payload, event=None):
+    """Formats one server-sent event with a JSON payload."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(payload)}\n\n"
+
+def stream_cached(text):
+    """Streams an already generated text as a single event."""
+    def generate():
+        yield sse_event({"text": text})
+        yield sse_event({}, event="done")
+    return Response(generate(), mimetype='text/event-stream')
+
+def stream_generation(response, on_complete):
+    """
+    Forwards a streaming Gemini response to the client as server-sent events.
+
+    on_complete receives the full text once the stream has finished, so the
+    caller can cache it.
+    """
+    def generate():
+        parts = []
+        try:
+            for chunk in response:
+                parts.append(chunk.text)
+                yield sse_event({"text": chunk.text})
+        except Exception:
+            print("--- AN ERROR OCCURRED WHILE STREAMING THE GEMINI RESPONSE ---")
+            traceback.print_exc()
+            print("-------------------------------------------------------------")
+            yield sse_event({"error": "The response was interrupted. Check the backend terminal for details."}, event="error")
+            return
+        try:
+            on_complete("".join(parts))
+        except Exception:
+            # The client already has the full text, so a failed cache write only gets logged
+            print("--- COULD NOT CACHE THE GEMINI RESPONSE ---")
+            traceback.print_exc()
+        yield sse_event({}, event="done")
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+# Temp folders are deleted by a background janitor so requests don't wait on rmtree
+cleanup_queue = queue.Queue()
+
+def cleanup_worker():
+    while True:
+        path = cleanup_queue.get()
+        try:
+            shutil.rmtree(path, onerror=remove_readonly)
+        except Exception:
+            print(f"--- COULD NOT CLEAN UP {path} ---")
+            traceback.print_exc()
+
+threading.Thread(target=cleanup_worker, daemon=True).start()
 
 # --- API ENDPOINTS ---
 # Add this somewhere near your other routes
@@ -90,18 +501,13 @@ def format_text():
         return jsonify({"error": "No text provided"}), 400
 
     try:
-        prompt = f"""
-        Please format the following text into a clean, well-structured document using Markdown. 
-        Identify the main title, headings, subheadings, bullet points, and any other relevant structures.
-        Ensure the output is only the formatted Markdown content.
-
-        Raw Text:
-        ---
-        {raw_text}
-        ---
-        """
-        response = model.generate_content(prompt)
-        return jsonify({"formatted_text": response.text})
+        [(key, vector, cached)] = lookup_formats([raw_text])
+        if cached is not None:
+            return stream_cached(cached)
+
+        prompt = "".join((FORMAT_PROMPT_PREFIX, raw_text, FORMAT_PROMPT_SUFFIX))
+        response = model.generate_content(prompt, stream=True)
+        return stream_generation(response, lambda text: store_format(raw_text, key, vector, text))
     except Exception as e:
         # This is the new, corrected part
         print("--- AN ERROR OCCURRED IN THE /api/format-text ROUTE ---")
@@ -109,80 +515,129 @@ def format_text():
         print("----------------------------------------------------")
         return jsonify({"error": "An internal error occurred. Check the backend terminal for details."}), 500
 
+# Bounds on a single /api/format-text-batch request
+MAX_BATCH_TEXTS = 20
+MAX_BATCH_CHARS = 60_000
+# Runs the one-by-one fallback of a batch concurrently
+format_executor = ThreadPoolExecutor(max_workers=4)
+
+def format_single_text(raw_text):
+    """Formats one text outside the batch prompt; returns None if the call fails."""
+    try:
+        return model.generate_content("".join((FORMAT_PROMPT_PREFIX, raw_text, FORMAT_PROMPT_SUFFIX))).text
+    except Exception:
+        print("--- COULD NOT FORMAT A TEXT FROM THE BATCH ---")
+        traceback.print_exc()
+        return None
+
+@app.route('/api/format-text-batch', methods=['POST'])
+def format_text_batch():
+    """
+    Formats several raw texts with a single AI call and returns them in order.
+
+    A text that couldn't be formatted comes back as null.
+    """
+    data = request.get_json(silent=True)
+    texts = data.get('texts') if isinstance(data, dict) else None
+
+    if not texts or not isinstance(texts, list) or not all(isinstance(text, str) and text for text in texts):
+        return jsonify({"error": "Provide a non-empty list of texts"}), 400
+    if len(texts) > MAX_BATCH_TEXTS or sum(len(text) for text in texts) > MAX_BATCH_CHARS:
+        return jsonify({"error": f"A batch can hold at most {MAX_BATCH_TEXTS} texts and {MAX_BATCH_CHARS} characters"}), 400
+
+    try:
+        # Same exact and semantic caches as /api/format-text; only the misses go into the batch
+        lookups = lookup_formats(texts)
+        formatted = [cached for _, _, cached in lookups]
+        missing = [i for i, result in enumerate(formatted) if result is None]
+
+        if missing:
+            sections = [f"\nText #{n}:\n---\n{texts[i]}\n---\n" for n, i in enumerate(missing, start=1)]
+            response = model.generate_content("".join([BATCH_PROMPT_PREFIX, *sections]))
+            results = [part.strip() for part in response.text.split(BATCH_DELIMITER)]
+            if results and not results[-1]:
+                results.pop()
+            if len(results) != len(missing):
+                # The sections can't be matched up (e.g. an input contained the delimiter),
+                # so each missing text is formatted on its own instead
+                print(f"--- BATCH RETURNED {len(results)} TEXTS FOR {len(missing)}, FORMATTING ONE BY ONE ---")
+                results = list(format_executor.map(format_single_text, [texts[i] for i in missing]))
+            for i, result in zip(missing, results):
+                # A text whose separate call failed stays None; the others are still returned
+                if result is None:
+                    continue
+                formatted[i] = result
+                key, vector, _ = lookups[i]
+                store_format(texts[i], key, vector, result)
+
+        return jsonify({"formatted_texts": formatted})
+    except Exception:
+        print("--- AN ERROR OCCURRED IN THE /api/format-text-batch ROUTE ---")
+        traceback.print_exc()
+        print("----------------------------------------------------------")
+        return jsonify({"error": "An internal error occurred. Check the backend terminal for details."}), 500
+
 @app.route('/api/generate-readme', methods=['POST'])
 def generate_readme():
     """Generates a README from a GitHub URL, a zip file, or individual files."""
-    repo_path = None # To ensure it's cleaned up
+    temp_dir = None # To ensure it's cleaned up
 
     try:
         if 'repo_url' in request.form and request.form['repo_url']:
             # ... (the code for handling repo_url remains the same) ...
             repo_url = request.form['repo_url']
-            repo_path = os.path.join("temp_repos", os.path.basename(repo_url))
-            if os.path.exists(repo_path):
-                shutil.rmtree(repo_path, onerror=remove_readonly)
-            git.Repo.clone_from(repo_url, repo_path)
-            project_summary = analyze_project_structure(repo_path)
+            head_sha = remote_head_sha(repo_url)
+            # With no commits there's no tree to analyze (and nothing for git to check out)
+            if head_sha is None:
+                return jsonify({"error": "The repository is empty"}), 400
+            project_summary = summary_cache.get((repo_url, head_sha))
+            if project_summary is None:
+                # Every request works in its own fresh folder, so there's nothing to delete first
+                temp_dir = tempfile.mkdtemp(prefix='intellidocs-', dir='temp_repos')
+                repo_path = os.path.join(temp_dir, os.path.basename(repo_url))
+                repo = clone_repo(repo_url, repo_path)
+                project_summary = analyze_git_tree(repo, os.path.basename(repo_path))
+                # Keyed on the commit actually cloned, in case HEAD moved since ls-remote
+                summary_cache.set((repo_url, repo.head.commit.hexsha), project_summary, expire=CACHE_TTL_SECONDS)
+                repo.close()
 
         elif 'zip_file' in request.files and request.files['zip_file'].filename != '':
             # ... (the code for handling zip_file remains the same) ...
             zip_file = request.files['zip_file']
-            repo_path = os.path.join("temp_uploads", "project_zip")
-            if os.path.exists(repo_path):
-                shutil.rmtree(repo_path, onerror=remove_readonly)
-            os.makedirs(repo_path)
-            zip_path = os.path.join(repo_path, zip_file.filename)
-            zip_file.save(zip_path)
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(repo_path)
-            project_summary = analyze_project_structure(repo_path)
+            # The upload is already spooled by Werkzeug, so it's read in place without saving or extracting
+            with zipfile.ZipFile(zip_file.stream, 'r') as zip_ref:
+                project_summary = analyze_zip_structure(zip_ref, "project_zip")
 
         elif 'files' in request.files:
             # ... (the code for handling multiple files remains the same) ...
             uploaded_files = request.files.getlist('files')
             if not uploaded_files or uploaded_files[0].filename == '':
                  return jsonify({"error": "No files were selected"}), 400
-            repo_path = os.path.join("temp_uploads", "project_files")
-            if os.path.exists(repo_path):
-                shutil.rmtree(repo_path, onerror=remove_readonly)
+            temp_dir = tempfile.mkdtemp(prefix='intellidocs-', dir='temp_uploads')
+            repo_path = os.path.join(temp_dir, "project_files")
             os.makedirs(repo_path)
             for file in uploaded_files:
                 if file and file.filename:
                     filename = secure_filename(file.filename)
-                    file.save(os.path.join(repo_path, filename))
+                    # Names like "../" sanitize to nothing and would otherwise point at the folder itself
+                    if not filename:
+                        continue
+                    # 1 MiB copy chunks instead of the 16 KiB default
+                    file.save(os.path.join(repo_path, filename), buffer_size=1 << 20)
             project_summary = analyze_project_structure(repo_path)
         
         else:
             return jsonify({"error": "No GitHub URL, zip file, or individual files provided"}), 400
-        
-        # --- THIS IS THE UPGRADED PROMPT WITH THE FLOW DIAGRAM ---
-        prompt = f"""
-        As an expert senior software developer and technical writer, create an exceptionally detailed and professional README.md file based on the following project analysis. The tone should be clear, comprehensive, and helpful to a new developer.
-
-        **Structure the README with the following sections in this exact order:**
-
-        1.  **Project Title:** A creative and descriptive title.
-        2.  **Project Overview:** A detailed paragraph explaining the project's purpose, what problem it solves, and who the target user is.
-        3.  **Key Features:** A bulleted list of the most important features.
-        4.  **Tech Stack:** A table listing the languages, frameworks, major libraries and external APIs (if any) used.
-        5.  **Workflow Diagram:** A detailed, text-based (ASCII) flow diagram illustrating the complete data and user flow of the application. The diagram should clearly show the simple path from the user's action on the React frontend, to the backend, to the external API if used any (also mention the name of API used if any), and back to the user.
-        6.  **Project Structure:** A brief explanation of the key files and folder structure. Describe the purpose of important files.
-        7.  **Setup and Installation:** A clear, step-by-step guide on how to get the project running locally. Include all necessary commands (e.g., `git clone`, `npm install`, `pip install`).
-        8.  **Usage:** Explain how to run the application and use its main features after installation.
-        9.  **Code Explanation:** (If applicable) Briefly explain the logic of one or two key functions or components from the provided code snippets.
-        10. **API Endpoints:** (If it's a backend project) List and describe the API endpoints, including the HTTP method and what they do. Don't assume anything on your own. Don't make any assumptions.
-
-        Here is the project analysis to use:
-        ---
-        {project_summary}
-        ---
-
-        Generate only the Markdown content for the README.md file. Do not include any introductory text like "Here is the README...".
-        """
-        # --- END OF UPGRADED PROMPT ---
-        
-        response = model.generate_content(prompt)
-        return jsonify({"readme_content": response.text})
+
+        project_summary = cap_project_summary(project_summary)
+        key = sha256(project_summary.encode()).hexdigest()
+        cached = readme_cache.get(key)
+        if cached is not None:
+            return stream_cached(cached)
+
+        prompt = "".join((README_PROMPT_PREFIX, project_summary, README_PROMPT_SUFFIX))
+        response = readme_model.generate_content(prompt, stream=True)
+        return stream_generation(response, lambda text: readme_cache.set(key, text, expire=CACHE_TTL_SECONDS))
 
     except Exception as e:
         # ... (the exception handling remains the same) ...
@@ -192,11 +647,9 @@ def generate_readme():
         return jsonify({"error": str(e)}), 500
     finally:
         # ... (the cleanup logic remains the same) ...
-        if repo_path and os.path.exists(repo_path):
-            shutil.rmtree(repo_path, onerror=remove_readonly)
+        if temp_dir:
+            cleanup_queue.put(temp_dir)
 
 if __name__ == '__main__':
-    # Ensure temp directories exist
-    os.makedirs("temp_repos", exist_ok=True)
-    os.makedirs("temp_uploads", exist_ok=True)
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    # Local development fallback (gunicorn doesn't run on Windows); no reloader, so the app loads once
+    app.run(port=5001)
@@ -0,0 +1,11 @@
+# Gunicorn settings, picked up automatically by `gunicorn app:app` run from this folder.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+
+# Requests spend nearly all their time waiting on git and Gemini, so each worker
+# serves several of them on threads. Threads rather than gevent, because the
+# Gemini SDK talks gRPC, which blocks under gevent's monkey-patching.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+threads = 8
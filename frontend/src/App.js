@@ -1,10 +1,41 @@
 import React, { useState } from 'react';
-import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
 
 // NEW, PRODUCTION-READY LINE
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5001/api';
 
+// POSTs to a streaming endpoint and calls onText for every chunk of server-sent events;
+// rejects unless the stream ends with a 'done' event
+const streamEvents = async (url, options, onText) => {
+    const response = await fetch(url, options);
+    if (!response.ok) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        // Without a 'done' event the text is incomplete, e.g. the server died mid-response
+        if (done) throw new Error('The connection closed before the response was complete.');
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop();
+        for (const message of messages) {
+            let event = 'message';
+            let data = '';
+            for (const line of message.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            const payload = JSON.parse(data);
+            if (event === 'error') throw new Error(payload.error);
+            if (event === 'done') return;
+            onText(payload.text);
+        }
+    }
+};
+
 const App = () => {
     const [activeTab, setActiveTab] = useState('formatter');
     
@@ -31,10 +62,14 @@ const App = () => {
         setError('');
         setFormattedText('');
         try {
-            const response = await axios.post(`${API_BASE_URL}/format-text`, { text: rawText });
-            setFormattedText(response.data.formatted_text);
+            await streamEvents(`${API_BASE_URL}/format-text`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ text: rawText }),
+            }, (text) => setFormattedText((prev) => prev + text));
         } catch (err) {
             setError('An error occurred while formatting. Please try again.');
+            setFormattedText('');
             console.error(err);
         } finally {
             setIsLoading(false);
@@ -62,12 +97,13 @@ const App = () => {
         }
 
         try {
-            const response = await axios.post(`${API_BASE_URL}/generate-readme`, formData, {
-                headers: { 'Content-Type': 'multipart/form-data' },
-            });
-            setReadmeContent(response.data.readme_content);
+            await streamEvents(`${API_BASE_URL}/generate-readme`, {
+                method: 'POST',
+                body: formData,
+            }, (text) => setReadmeContent((prev) => prev + text));
         } catch (err) {
             setError('Failed to generate README. The repository might be private or invalid.');
+            setReadmeContent('');
             console.error(err);
         } finally {
             setIsLoading(false);